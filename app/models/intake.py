@@ -157,10 +157,14 @@ class WizardState(BaseModel):
 
     def mark_answered(self, question_ids: List[str]):
         """Marca perguntas como respondidas."""
-        for qid in question_ids:
-            if qid in self.remaining_questions:
-                self.remaining_questions.remove(qid)
-                self.answered_questions.append(qid)
+        pending = set(self.remaining_questions)
+        newly_answered = [qid for qid in dict.fromkeys(question_ids) if qid in pending]
+        if not newly_answered:
+            return
+
+        answered = set(newly_answered)
+        self.remaining_questions = [qid for qid in self.remaining_questions if qid not in answered]
+        self.answered_questions.extend(newly_answered)
 
 
 class SummaryResponse(BaseModel):
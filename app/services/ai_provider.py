@@ -66,6 +66,7 @@ class AIProvider(ABC):
         images: Optional[List[str]] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        image_parts: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> str:
         """
@@ -76,6 +77,8 @@ class AIProvider(ABC):
             images: List of base64 encoded images
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            image_parts: Image content parts already built with
+                build_image_content_parts; used instead of images when given
             **kwargs: Additional provider-specific parameters
             
         Returns:
@@ -107,7 +110,7 @@ class AIProvider(ABC):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class AIResponse:
     """Standardized response format from AI providers."""
     content: str
@@ -121,6 +124,22 @@ class AIProviderType(Enum):
     GEMINI = "gemini"
     
     
+def build_image_content_parts(images: List[str]) -> List[Dict[str, Any]]:
+    """
+    Build standard image_url content parts for base64 encoded images.
+    
+    Args:
+        images: List of base64 encoded JPEG images
+        
+    Returns:
+        Content parts ready to append to a multimodal user message
+    """
+    return [
+        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img}"}}
+        for img in images
+    ]
+
+
 def convert_messages_to_gemini_format(messages: List[Dict[str, Any]]) -> Tuple[str, List[Dict]]:
     """
     Convert standard message format to Gemini format.
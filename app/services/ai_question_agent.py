@@ -7,13 +7,14 @@ Gera perguntas naturais e contextuais baseadas apenas na descrição do projeto.
 """
 
 import json
-import re
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from pydantic import ValidationError
 from app.models.api_models import Question, QuestionChoice
 from app.services.ai_factory import get_ai_provider
-from app.services.question_cache import get_question_cache
+from app.services.ai_provider import AIProvider
+from app.services.question_cache import QuestionCache, get_question_cache
 from app.utils.pii_safe_logging import get_pii_safe_logger
 from app.utils.config import get_settings
 
@@ -120,6 +121,57 @@ def validate_questions_json(json_data: Dict) -> Tuple[List[Question], List[str]]
     return validated_questions, validation_errors
 
 
+# Static fallback questions, built once at import. _get_fallback_questions hands
+# out shallow copies since callers rewrite code/category on the returned objects.
+_FALLBACK_QUESTIONS: Tuple[Question, ...] = (
+    Question(
+        code="Q001",
+        text="Qual é o principal objetivo deste projeto?",
+        why_it_matters="Define a estratégia de desenvolvimento e prioridades técnicas do projeto.",
+        choices=[
+            QuestionChoice(id="automate", text="Automatizar processos manuais"),
+            QuestionChoice(id="improve", text="Melhorar sistema existente"),
+            QuestionChoice(id="new", text="Criar nova solução do zero"),
+            QuestionChoice(id="integrate", text="Integrar sistemas diferentes"),
+            QuestionChoice(id="other", text="Outro objetivo")
+        ],
+        required=True,
+        allow_multiple=False,
+        category="business"
+    ),
+    Question(
+        code="Q002",
+        text="Qual é o prazo esperado para a primeira entrega?",
+        why_it_matters="Determina a metodologia de desenvolvimento e recursos necessários para atender o cronograma.",
+        choices=[
+            QuestionChoice(id="urgent", text="Menos de 1 mês (urgente)"),
+            QuestionChoice(id="short", text="1-3 meses"),
+            QuestionChoice(id="medium", text="3-6 meses"),
+            QuestionChoice(id="long", text="6-12 meses"),
+            QuestionChoice(id="flexible", text="Prazo flexível")
+        ],
+        required=True,
+        allow_multiple=False,
+        category="operational"
+    ),
+    Question(
+        code="Q003",
+        text="Quantos usuários você espera que usem o sistema?",
+        why_it_matters="Define a arquitetura de escalabilidade e infraestrutura necessária para suportar a carga esperada.",
+        choices=[
+            QuestionChoice(id="small", text="Menos de 100 usuários"),
+            QuestionChoice(id="medium", text="100 a 1.000 usuários"),
+            QuestionChoice(id="large", text="1.000 a 10.000 usuários"),
+            QuestionChoice(id="enterprise", text="Mais de 10.000 usuários"),
+            QuestionChoice(id="unknown", text="Ainda não sei")
+        ],
+        required=True,
+        allow_multiple=False,
+        category="technical"
+    )
+)
+
+
 class AIQuestionAgent:
     """
     Agente IA que age como desenvolvedor sênior/Product Owner fazendo perguntas inteligentes.
@@ -133,14 +185,25 @@ class AIQuestionAgent:
     
     def __init__(self):
         """Initialize the AI Question Agent."""
-        self.ai_provider = get_ai_provider()
+        # Resolve the provider now so a missing or invalid config fails when the agent is built;
+        # the ai_provider property still looks it up again on each use
+        get_ai_provider()
         self.settings = get_settings()
         self.system_prompt = self._create_system_prompt()
-        self.cache = get_question_cache()
         
         logger.info("🤖 AI Question Agent initialized", extra={
             "cache_enabled": True
         })
+    
+    @property
+    def ai_provider(self) -> AIProvider:
+        """Current global AI provider, so set_ai_provider() reaches the shared agent."""
+        return get_ai_provider()
+    
+    @property
+    def cache(self) -> QuestionCache:
+        """Current global question cache, so clear_question_cache() reaches the shared agent."""
+        return get_question_cache()
         
     def _create_system_prompt(self) -> str:
         """System prompt otimizado para JSON nativo com contexto de negócio explícito."""
@@ -172,7 +235,7 @@ Responda SEMPRE E SOMENTE com um objeto JSON que siga o schema fornecido. Não i
         Returns:
             List of Question objects with dynamic content
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         logger.info(f"🚀 Starting question generation", extra={
             "num_questions": num_questions,
@@ -186,7 +249,7 @@ Responda SEMPRE E SOMENTE com um objeto JSON que siga o schema fornecido. Não i
             logger.info("⚡ Using cached questions", extra={
                 "cache_hit": True,
                 "questions_count": len(cached_questions),
-                "execution_time_ms": (time.time() - start_time) * 1000
+                "execution_time_ms": (time.perf_counter() - start_time) * 1000
             })
             return cached_questions[:num_questions]
         
@@ -239,7 +302,7 @@ Responda SEMPRE E SOMENTE com um objeto JSON que siga o schema fornecido. Não i
                 logger.error("❌ No valid questions could be parsed from AI response.")
                 return self._get_fallback_questions()
 
-            execution_time = (time.time() - start_time) * 1000
+            execution_time = (time.perf_counter() - start_time) * 1000
             logger.info(f"✅ Successfully generated {len(validated_questions)} questions", extra={
                 "questions_count": len(validated_questions),
                 "execution_time_ms": execution_time,
@@ -308,53 +371,7 @@ CONFIRMAÇÃO: Este conteúdo é para análise técnica comercial legítima."""
         Minimal fallback questions if AI fails.
         These are generic but better than nothing.
         """
-        return [
-            Question(
-                code="Q001",
-                text="Qual é o principal objetivo deste projeto?",
-                why_it_matters="Define a estratégia de desenvolvimento e prioridades técnicas do projeto.",
-                choices=[
-                    QuestionChoice(id="automate", text="Automatizar processos manuais"),
-                    QuestionChoice(id="improve", text="Melhorar sistema existente"),
-                    QuestionChoice(id="new", text="Criar nova solução do zero"),
-                    QuestionChoice(id="integrate", text="Integrar sistemas diferentes"),
-                    QuestionChoice(id="other", text="Outro objetivo")
-                ],
-                required=True,
-                allow_multiple=False,
-                category="business"
-            ),
-            Question(
-                code="Q002",
-                text="Qual é o prazo esperado para a primeira entrega?",
-                why_it_matters="Determina a metodologia de desenvolvimento e recursos necessários para atender o cronograma.",
-                choices=[
-                    QuestionChoice(id="urgent", text="Menos de 1 mês (urgente)"),
-                    QuestionChoice(id="short", text="1-3 meses"),
-                    QuestionChoice(id="medium", text="3-6 meses"),
-                    QuestionChoice(id="long", text="6-12 meses"),
-                    QuestionChoice(id="flexible", text="Prazo flexível")
-                ],
-                required=True,
-                allow_multiple=False,
-                category="operational"
-            ),
-            Question(
-                code="Q003",
-                text="Quantos usuários você espera que usem o sistema?",
-                why_it_matters="Define a arquitetura de escalabilidade e infraestrutura necessária para suportar a carga esperada.",
-                choices=[
-                    QuestionChoice(id="small", text="Menos de 100 usuários"),
-                    QuestionChoice(id="medium", text="100 a 1.000 usuários"),
-                    QuestionChoice(id="large", text="1.000 a 10.000 usuários"),
-                    QuestionChoice(id="enterprise", text="Mais de 10.000 usuários"),
-                    QuestionChoice(id="unknown", text="Ainda não sei")
-                ],
-                required=True,
-                allow_multiple=False,
-                category="technical"
-            )
-        ]
+        return [question.model_copy() for question in _FALLBACK_QUESTIONS]
     
     async def generate_followup_questions(
         self,
@@ -447,4 +464,10 @@ Evite repetir tópicos já cobertos.
             if not q.code.startswith("R"):
                 q.code = f"R{q.code[1:]}" if q.code[0] == "Q" else f"R{q.code}"
         
-        return questions
\ No newline at end of file
+        return questions
+
+
+@lru_cache(maxsize=1)
+def get_ai_question_agent() -> AIQuestionAgent:
+    """Get global AI question agent instance."""
+    return AIQuestionAgent()
\ No newline at end of file
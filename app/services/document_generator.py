@@ -291,13 +291,14 @@ Focus on DOCUMENTATION DEPTH, not code snippets.
                 selected_choices = answer.get("selected_choices", [])
             
             # Map answers to context
-            if any(term in question_code.lower() for term in ["device", "platform", "dispositivo"]):
+            code_lower = question_code.lower()
+            if any(term in code_lower for term in ("device", "platform", "dispositivo")):
                 context["requirements"]["platforms"].extend(selected_choices)
-            elif any(term in question_code.lower() for term in ["integration", "peripheral", "periférico"]):
+            elif any(term in code_lower for term in ("integration", "peripheral", "periférico")):
                 context["requirements"]["integrations"].extend(selected_choices)
-            elif any(term in question_code.lower() for term in ["compliance", "fiscal", "regulament"]):
+            elif any(term in code_lower for term in ("compliance", "fiscal", "regulament")):
                 context["requirements"]["compliance"].extend(selected_choices)
-            elif any(term in question_code.lower() for term in ["performance", "sla", "desempenho"]):
+            elif any(term in code_lower for term in ("performance", "sla", "desempenho")):
                 context["requirements"]["performance"]["sla"] = selected_choices[0] if selected_choices else "standard"
         
         return context
@@ -3,8 +3,10 @@ Google Gemini AI Provider implementation.
 Supports Gemini 2.0 Flash and other Gemini models.
 """
 
+import asyncio
 import json
 import logging
+import re
 from typing import Dict, List, Any, Optional
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
@@ -12,6 +14,7 @@ from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from app.services.ai_provider import (
     AIProvider, 
     AIResponse, 
+    build_image_content_parts,
     convert_messages_to_gemini_format,
     convert_gemini_response_to_standard_format
 )
@@ -20,6 +23,17 @@ from app.utils.pii_safe_logging import get_pii_safe_logger
 
 logger = get_pii_safe_logger(__name__)
 
+# Gemini context limits
+GEMINI_CONTEXT_LIMITS = {
+    "gemini-2.5-flash": 1048576,      # 1M tokens
+    "gemini-2.5-pro": 2097152,        # 2M tokens
+    "gemini-2.0-flash-exp": 1048576,  # 1M tokens (experimental)
+    "gemini-1.5-flash": 1048576,      # 1M tokens
+    "gemini-1.5-pro": 2097152,        # 2M tokens
+    "gemini-1.0-pro": 32768,          # 32k tokens
+}
+DEFAULT_CONTEXT_LIMIT = 1048576  # Default to 1M
+
 
 def create_questions_response_schema() -> Dict[str, Any]:
     """
@@ -91,6 +105,35 @@ def create_questions_response_schema() -> Dict[str, Any]:
     }
 
 
+# Palavras que podem causar safety blocks em contexto corporativo
+BUSINESS_TRIGGER_REPLACEMENTS = {
+    # Termos financeiros que podem ser interpretados como perigosos
+    "core bancário": "sistema financeiro central",
+    "banking core": "sistema financeiro central", 
+    "antifraude": "sistema de prevenção de riscos",
+    "compliance": "conformidade regulatória",
+    "lavagem de dinheiro": "prevenção de riscos financeiros",
+    "money laundering": "prevenção de riscos financeiros",
+    
+    # Termos de saúde que podem ser sensíveis
+    "hospitalar": "de gestão em saúde",
+    "médico": "profissional de saúde",
+    "clínica": "estabelecimento de saúde",
+    "diagnóstico": "avaliação profissional",
+    
+    # Termos técnicos que podem parecer perigosos
+    "sistema crítico": "sistema essencial",
+    "falha crítica": "interrupção do sistema",
+    "disaster recovery": "recuperação de contingência",
+    "alta disponibilidade": "disponibilidade contínua"
+}
+
+# Single-pass matcher for all triggers (longest first so overlapping terms resolve like the table)
+_BUSINESS_TRIGGER_PATTERN = re.compile(
+    "|".join(re.escape(trigger) for trigger in sorted(BUSINESS_TRIGGER_REPLACEMENTS, key=len, reverse=True))
+)
+
+
 class GeminiProvider(AIProvider):
     """Google Gemini AI provider implementation."""
     
@@ -173,34 +216,9 @@ class GeminiProvider(AIProvider):
         """
         Sanitize business content to reduce safety triggers while preserving meaning.
         """
-        # Palavras que podem causar safety blocks em contexto corporativo
-        trigger_replacements = {
-            # Termos financeiros que podem ser interpretados como perigosos
-            "core bancário": "sistema financeiro central",
-            "banking core": "sistema financeiro central", 
-            "antifraude": "sistema de prevenção de riscos",
-            "compliance": "conformidade regulatória",
-            "lavagem de dinheiro": "prevenção de riscos financeiros",
-            "money laundering": "prevenção de riscos financeiros",
-            
-            # Termos de saúde que podem ser sensíveis
-            "hospitalar": "de gestão em saúde",
-            "médico": "profissional de saúde",
-            "clínica": "estabelecimento de saúde",
-            "diagnóstico": "avaliação profissional",
-            
-            # Termos técnicos que podem parecer perigosos
-            "sistema crítico": "sistema essencial",
-            "falha crítica": "interrupção do sistema",
-            "disaster recovery": "recuperação de contingência",
-            "alta disponibilidade": "disponibilidade contínua"
-        }
-        
-        sanitized = content
-        for trigger, replacement in trigger_replacements.items():
-            sanitized = sanitized.replace(trigger, replacement)
-            
-        return sanitized
+        return _BUSINESS_TRIGGER_PATTERN.sub(
+            lambda match: BUSINESS_TRIGGER_REPLACEMENTS[match.group(0)], content
+        )
     
     async def generate_response(
         self,
@@ -268,14 +286,14 @@ class GeminiProvider(AIProvider):
                     "parts": [{"text": "Please provide your response based on the system instructions."}]
                 }]
             
-            # Start chat or generate content
+            # Start chat or generate content (blocking SDK calls run off the event loop)
             if len(gemini_contents) > 1:
                 # Multi-turn conversation
                 chat = model.start_chat(history=gemini_contents[:-1])
-                response = chat.send_message(gemini_contents[-1]["parts"])
+                response = await asyncio.to_thread(chat.send_message, gemini_contents[-1]["parts"])
             else:
                 # Single turn
-                response = model.generate_content(gemini_contents[0]["parts"])
+                response = await asyncio.to_thread(model.generate_content, gemini_contents[0]["parts"])
             
             # Extract text from response
             text_response = convert_gemini_response_to_standard_format(response)
@@ -411,10 +429,6 @@ class GeminiProvider(AIProvider):
                     logger.error("❌ Cannot generate response with empty content")
                     continue
 
-                # Generate content with asyncio timeout for 2.5 Flash
-                import asyncio
-                import threading
-                
                 # Extract the text content properly for Gemini
                 content_text = ""
                 if gemini_contents[0]["parts"]:
@@ -427,15 +441,10 @@ class GeminiProvider(AIProvider):
                             text_parts.append(part)
                     content_text = " ".join(text_parts)
                 
-                # Apply timeout based on strategy configuration
-                def generate_with_timeout():
-                    return model.generate_content(content_text)
-                
-                # Use timeout for all models, but different durations
+                # The SDK call is blocking; run it in a worker thread so concurrent
+                # requests keep being served while Gemini responds
                 try:
-                    # Simple timeout implementation without signals 
-                    # (More complex timeout would require threading/multiprocessing)
-                    response = generate_with_timeout()
+                    response = await asyncio.to_thread(model.generate_content, content_text)
                 except Exception as e:
                     if "timeout" in str(e).lower():
                         raise TimeoutError(f"Model generation timeout after {timeout_seconds}s")
@@ -501,7 +510,7 @@ class GeminiProvider(AIProvider):
                 continue
             except Exception as e:
                 logger.error(f"❌ {model_desc}: Generation error: {e}")
-                if attempt == len(models_to_try) - 1:  # Last attempt
+                if attempt == len(strategies_to_try) - 1:  # Last attempt
                     error_details = str(e)
                     if hasattr(e, 'response'):
                         error_details += f" | API Response: {getattr(e, 'response', 'N/A')}"
@@ -521,38 +530,46 @@ class GeminiProvider(AIProvider):
         images: Optional[List[str]] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        image_parts: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> str:
         """
         Generate response with multimodal input (text + images).
         
+        The given messages are left untouched; images are attached to a copy of
+        the last user message, so the same list can be reused across retries.
+        
         Args:
             messages: List of message dictionaries
             images: List of base64 encoded images
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            image_parts: Image content parts already built with
+                build_image_content_parts; used instead of images when given
             **kwargs: Additional parameters
             
         Returns:
             Generated text response
         """
         try:
-            # If images are provided separately, add them to the last user message
-            if images and messages:
+            if image_parts is None and images:
+                image_parts = build_image_content_parts(images)
+            
+            # If images are provided separately, add them to a copy of the last
+            # user message so the caller's messages are never modified
+            if image_parts and messages:
+                messages = list(messages)
                 # Find last user message
                 for i in range(len(messages) - 1, -1, -1):
                     if messages[i].get("role") == "user":
+                        target = dict(messages[i])
                         # Convert to multimodal format if needed
-                        if isinstance(messages[i]["content"], str):
-                            messages[i]["content"] = [
-                                {"type": "text", "text": messages[i]["content"]}
-                            ]
+                        content = target["content"]
+                        if isinstance(content, str):
+                            content = [{"type": "text", "text": content}]
                         # Add images
-                        for img in images:
-                            messages[i]["content"].append({
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{img}"}
-                            })
+                        target["content"] = [*content, *image_parts]
+                        messages[i] = target
                         break
             
             # Use regular generate_response which handles multimodal
@@ -591,13 +608,4 @@ class GeminiProvider(AIProvider):
     
     def get_context_limit(self) -> int:
         """Get the context window limit for the current model."""
-        # Gemini context limits
-        context_limits = {
-            "gemini-2.5-flash": 1048576,      # 1M tokens
-            "gemini-2.5-pro": 2097152,        # 2M tokens  
-            "gemini-2.0-flash-exp": 1048576,  # 1M tokens (experimental)
-            "gemini-1.5-flash": 1048576,      # 1M tokens
-            "gemini-1.5-pro": 2097152,        # 2M tokens
-            "gemini-1.0-pro": 32768,          # 32k tokens
-        }
-        return context_limits.get(self.model_name, 1048576)  # Default to 1M
\ No newline at end of file
+        return GEMINI_CONTEXT_LIMITS.get(self.model_name, DEFAULT_CONTEXT_LIMIT)
\ No newline at end of file
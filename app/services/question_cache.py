@@ -9,10 +9,13 @@ Provides:
 """
 
 import hashlib
+import heapq
+import re
 import time
-from typing import Dict, List, Optional, Tuple, Any
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass
-from collections import defaultdict
+from functools import lru_cache
+from collections import OrderedDict, defaultdict
 
 from app.models.api_models import Question
 from app.utils.pii_safe_logging import get_pii_safe_logger
@@ -20,8 +23,18 @@ from app.utils.config import get_settings
 
 logger = get_pii_safe_logger(__name__)
 
+# Common words ignored when extracting keywords from project descriptions
+_STOPWORDS = frozenset({
+    'o', 'a', 'de', 'da', 'do', 'para', 'com', 'em', 'um', 'uma',
+    'que', 'e', 'ou', 'se', 'por', 'no', 'na', 'dos', 'das',
+    'system', 'sistema', 'preciso', 'quero', 'fazer', 'criar'
+})
 
-@dataclass
+# Anything that is not a letter or digit (accented letters are kept)
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+
+@dataclass(slots=True)
 class CacheEntry:
     """Single cache entry with questions and metadata."""
     
@@ -32,15 +45,17 @@ class CacheEntry:
     access_count: int
     last_accessed: float
     similarity_score: float = 0.0
+    keywords: FrozenSet[str] = frozenset()
+    keyword_count: int = 0
     
     def is_expired(self, ttl_seconds: int) -> bool:
         """Check if cache entry is expired."""
-        return time.time() - self.created_at > ttl_seconds
+        return time.monotonic() - self.created_at > ttl_seconds
     
     def touch(self):
         """Update access tracking."""
         self.access_count += 1
-        self.last_accessed = time.time()
+        self.last_accessed = time.monotonic()
 
 
 class QuestionCache:
@@ -73,17 +88,18 @@ class QuestionCache:
         self.ttl_seconds = ttl_seconds or settings.question_cache_ttl_seconds
         self.similarity_threshold = similarity_threshold or settings.question_similarity_threshold
         
-        # Cache storage
-        self.cache: Dict[str, CacheEntry] = {}
-        self.keyword_index: Dict[str, List[str]] = defaultdict(list)
+        # Cache storage, ordered from least to most recently used
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.keyword_index: Dict[str, Set[str]] = defaultdict(set)
+        # (expires_at, project_hash) pairs; may hold stale pairs for entries
+        # that were evicted or stored again, which are skipped when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
         
-        # Statistics
-        self.stats = {
-            "hits": 0,
-            "misses": 0,
-            "evictions": 0,
-            "total_requests": 0
-        }
+        # Statistics, kept as plain counters and only assembled in get_stats()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._total_requests = 0
         
         logger.info("🧠 Question cache initialized", extra={
             "max_entries": max_entries,
@@ -91,102 +107,86 @@ class QuestionCache:
             "similarity_threshold": similarity_threshold
         })
     
-    def _generate_project_hash(self, description: str) -> str:
-        """Generate hash for project description."""
-        # Normalize text for consistent hashing
-        normalized = description.lower().strip()
-        # Remove extra whitespace
-        normalized = " ".join(normalized.split())
-        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+    def _split_words(self, description: str) -> List[str]:
+        """Split project description into lowercase words, shared by hashing and keyword extraction."""
+        return description.lower().split()
+    
+    def _generate_project_hash(self, words: List[str]) -> str:
+        """Generate hash for the words of a project description."""
+        # Rejoin with single spaces so extra whitespace doesn't change the hash
+        normalized = " ".join(words)
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
     
-    def _extract_keywords(self, description: str) -> List[str]:
-        """Extract keywords from project description."""
+    def _extract_keywords(self, words: List[str]) -> Set[str]:
+        """Extract keywords from the words of a project description."""
         # Simple keyword extraction (can be improved with NLP)
-        words = description.lower().split()
-        
-        # Filter out common words and keep meaningful ones
-        stopwords = {
-            'o', 'a', 'de', 'da', 'do', 'para', 'com', 'em', 'um', 'uma',
-            'que', 'e', 'ou', 'se', 'por', 'no', 'na', 'dos', 'das',
-            'system', 'sistema', 'preciso', 'quero', 'fazer', 'criar'
-        }
-        
-        keywords = []
+        keywords = set()
         for word in words:
             # Clean word
-            clean_word = ''.join(char for char in word if char.isalnum())
+            clean_word = _NON_ALNUM.sub('', word)
             
             # Keep meaningful words (length > 3, not stopwords)
-            if len(clean_word) > 3 and clean_word not in stopwords:
-                keywords.append(clean_word)
+            if len(clean_word) > 3 and clean_word not in _STOPWORDS:
+                keywords.add(clean_word)
+                if len(keywords) >= 10:  # Limit to top 10 keywords
+                    break
         
-        return keywords[:10]  # Limit to top 10 keywords
+        return keywords
     
-    def _calculate_similarity(self, desc1: str, desc2: str) -> float:
-        """Calculate similarity between two project descriptions."""
-        words1 = set(self._extract_keywords(desc1))
-        words2 = set(self._extract_keywords(desc2))
-        
+    def _calculate_similarity(self, words1: AbstractSet[str], words2: AbstractSet[str]) -> float:
+        """Calculate similarity between the keyword sets of two project descriptions."""
         if not words1 and not words2:
             return 0.0
         if not words1 or not words2:
             return 0.0
         
-        # Jaccard similarity
+        # Jaccard similarity; the union size follows from the intersection
         intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        union = len(words1) + len(words2) - intersection
         
         return intersection / union if union > 0 else 0.0
     
     def _cleanup_expired(self):
         """Remove expired entries from cache."""
-        current_time = time.time()
+        current_time = time.monotonic()
         expired_keys = []
         
-        for key, entry in self.cache.items():
-            if entry.is_expired(self.ttl_seconds):
+        # Only the head of the heap needs checking while nothing has expired
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            _, key = heapq.heappop(self._expiry_heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry.is_expired(self.ttl_seconds):
                 expired_keys.append(key)
-        
-        for key in expired_keys:
-            self._remove_entry(key)
+                self._remove_entry(key)
             
         if expired_keys:
             logger.debug(f"🧹 Cleaned up {len(expired_keys)} expired cache entries")
     
     def _evict_lru(self):
         """Evict least recently used entries if cache is full."""
-        if len(self.cache) < self.max_entries:
-            return
-        
-        # Find least recently used entry
-        lru_key = min(
-            self.cache.keys(),
-            key=lambda k: self.cache[k].last_accessed
-        )
-        
-        self._remove_entry(lru_key)
-        self.stats["evictions"] += 1
-        
-        logger.debug(f"🗑️ Evicted LRU cache entry: {lru_key}")
+        while self.cache and len(self.cache) >= self.max_entries:
+            # Least recently used entry sits at the front
+            lru_key, lru_entry = self.cache.popitem(last=False)
+            self._unindex_entry(lru_key, lru_entry)
+            self._evictions += 1
+            
+            logger.debug(f"🗑️ Evicted LRU cache entry: {lru_key}")
     
     def _remove_entry(self, key: str):
         """Remove cache entry and update indexes."""
-        if key not in self.cache:
-            return
-        
-        entry = self.cache[key]
-        
-        # Remove from keyword index
-        keywords = self._extract_keywords(entry.project_description)
-        for keyword in keywords:
-            if key in self.keyword_index[keyword]:
-                self.keyword_index[keyword].remove(key)
-                # Clean up empty keyword lists
-                if not self.keyword_index[keyword]:
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self._unindex_entry(key, entry)
+    
+    def _unindex_entry(self, key: str, entry: CacheEntry):
+        """Remove an entry that is no longer in the cache from the keyword index."""
+        for keyword in entry.keywords:
+            keys = self.keyword_index.get(keyword)
+            if keys is not None:
+                keys.discard(key)
+                # Clean up empty keyword sets
+                if not keys:
                     del self.keyword_index[keyword]
-        
-        # Remove from main cache
-        del self.cache[key]
     
     def get(self, project_description: str) -> Optional[List[Question]]:
         """
@@ -198,19 +198,21 @@ class QuestionCache:
         Returns:
             Cached questions if found with sufficient similarity, None otherwise
         """
-        self.stats["total_requests"] += 1
+        self._total_requests += 1
         
         # Clean up expired entries
         self._cleanup_expired()
         
         # Try exact hash match first
-        project_hash = self._generate_project_hash(project_description)
+        words = self._split_words(project_description)
+        project_hash = self._generate_project_hash(words)
         
-        if project_hash in self.cache:
-            entry = self.cache[project_hash]
+        entry = self.cache.get(project_hash)
+        if entry is not None:
             if not entry.is_expired(self.ttl_seconds):
                 entry.touch()
-                self.stats["hits"] += 1
+                self.cache.move_to_end(project_hash)
+                self._hits += 1
                 
                 logger.info("🎯 Cache HIT (exact)", extra={
                     "project_hash": project_hash,
@@ -221,13 +223,14 @@ class QuestionCache:
                 return entry.questions
         
         # Try similarity-based matching
-        best_match = self._find_similar_entry(project_description)
+        best_match = self._find_similar_entry(self._extract_keywords(words))
         
         if best_match:
             entry, similarity = best_match
             entry.touch()
+            self.cache.move_to_end(entry.project_hash)
             entry.similarity_score = similarity
-            self.stats["hits"] += 1
+            self._hits += 1
             
             logger.info("🎯 Cache HIT (similar)", extra={
                 "similarity": similarity,
@@ -238,7 +241,7 @@ class QuestionCache:
             return entry.questions
         
         # Cache miss
-        self.stats["misses"] += 1
+        self._misses += 1
         logger.debug("❌ Cache MISS", extra={
             "project_hash": project_hash,
             "description_length": len(project_description)
@@ -246,29 +249,42 @@ class QuestionCache:
         
         return None
     
-    def _find_similar_entry(self, description: str) -> Optional[Tuple[CacheEntry, float]]:
-        """Find most similar cache entry."""
-        keywords = self._extract_keywords(description)
-        candidate_keys = set()
+    def _find_similar_entry(self, keywords: AbstractSet[str]) -> Optional[Tuple[CacheEntry, float]]:
+        """Find most similar cache entry for the keywords of a project description."""
+        if not keywords or not self.keyword_index:
+            return None
+        
+        keyword_count = len(keywords)
+        overlap: Dict[str, int] = defaultdict(int)
         
-        # Find candidates based on keyword overlap
+        # Find candidates and count their shared keywords
         for keyword in keywords:
             if keyword in self.keyword_index:
-                candidate_keys.update(self.keyword_index[keyword])
+                for key in self.keyword_index[keyword]:
+                    overlap[key] += 1
+        
+        if not overlap:
+            return None
         
         best_entry = None
         best_similarity = 0.0
         
         # Calculate similarity for candidates
-        for key in candidate_keys:
+        for key, shared in overlap.items():
             if key not in self.cache:
                 continue
                 
             entry = self.cache[key]
+            
+            # Jaccard similarity can't exceed shared / max(|a|, |b|), so skip
+            # candidates that could never reach the threshold
+            if shared < self.similarity_threshold * max(keyword_count, entry.keyword_count):
+                continue
+            
             if entry.is_expired(self.ttl_seconds):
                 continue
             
-            similarity = self._calculate_similarity(description, entry.project_description)
+            similarity = self._calculate_similarity(keywords, entry.keywords)
             
             if similarity > best_similarity and similarity >= self.similarity_threshold:
                 best_similarity = similarity
@@ -284,33 +300,39 @@ class QuestionCache:
             project_description: Project description
             questions: Generated questions to cache
         """
-        project_hash = self._generate_project_hash(project_description)
+        words = self._split_words(project_description)
+        project_hash = self._generate_project_hash(words)
+        keywords = self._extract_keywords(words)
         
         # Evict LRU if necessary
         self._evict_lru()
         
         # Create cache entry
+        now = time.monotonic()
         entry = CacheEntry(
             questions=questions,
             project_hash=project_hash,
             project_description=project_description,
-            created_at=time.time(),
+            created_at=now,
             access_count=0,
-            last_accessed=time.time()
+            last_accessed=now,
+            keywords=frozenset(keywords),
+            keyword_count=len(keywords)
         )
         
-        # Store in cache
+        # Store in cache as the most recently used entry
         self.cache[project_hash] = entry
+        self.cache.move_to_end(project_hash)
+        heapq.heappush(self._expiry_heap, (entry.created_at + self.ttl_seconds, project_hash))
         
         # Update keyword index
-        keywords = self._extract_keywords(project_description)
-        for keyword in keywords:
-            self.keyword_index[keyword].append(project_hash)
+        for keyword in entry.keywords:
+            self.keyword_index[keyword].add(project_hash)
         
         logger.info("💾 Questions cached", extra={
             "project_hash": project_hash,
             "questions_count": len(questions),
-            "keywords": keywords[:5],  # Log first 5 keywords
+            "keywords": list(keywords)[:5],  # Log first 5 keywords
             "cache_size": len(self.cache)
         })
     
@@ -323,48 +345,42 @@ class QuestionCache:
                                If None, clear entire cache.
         """
         if project_description:
-            project_hash = self._generate_project_hash(project_description)
+            project_hash = self._generate_project_hash(self._split_words(project_description))
             self._remove_entry(project_hash)
             logger.info(f"🗑️ Invalidated cache entry: {project_hash}")
         else:
             self.cache.clear()
             self.keyword_index.clear()
+            self._expiry_heap.clear()
             logger.info("🗑️ Cleared entire question cache")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        total_requests = self.stats["total_requests"]
-        hit_rate = (self.stats["hits"] / total_requests * 100) if total_requests > 0 else 0
+        total_requests = self._total_requests
+        hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
         
         return {
             "cache_size": len(self.cache),
             "max_entries": self.max_entries,
             "hit_rate_percent": round(hit_rate, 2),
             "total_requests": total_requests,
-            "hits": self.stats["hits"],
-            "misses": self.stats["misses"],
-            "evictions": self.stats["evictions"],
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
             "keyword_index_size": len(self.keyword_index),
             "ttl_seconds": self.ttl_seconds,
             "similarity_threshold": self.similarity_threshold
         }
 
 
-# Global cache instance
-_global_cache: Optional[QuestionCache] = None
-
-
+@lru_cache(maxsize=1)
 def get_question_cache() -> QuestionCache:
     """Get global question cache instance."""
-    global _global_cache
-    if _global_cache is None:
-        _global_cache = QuestionCache()
-    return _global_cache
+    return QuestionCache()
 
 
 def clear_question_cache():
     """Clear global question cache."""
-    global _global_cache
-    if _global_cache:
-        _global_cache.invalidate()
-        _global_cache = None
\ No newline at end of file
+    if get_question_cache.cache_info().currsize:
+        get_question_cache().invalidate()
+        get_question_cache.cache_clear()
\ No newline at end of file
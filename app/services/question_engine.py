@@ -4,16 +4,132 @@ Uses AI to generate dynamic questions with 70% multiple choice guaranteed covera
 Combines mandatory standardized questions with AI-generated contextual questions.
 """
 
-import logging
-from typing import List, Dict, Any, Optional
+import asyncio
+import weakref
+from typing import List, Dict, Any, Optional, Tuple
 
 from app.models.api_models import Question, QuestionChoice
-from app.services.ai_question_agent import AIQuestionAgent
-from app.services.question_templates import QuestionTemplates
+from app.services.ai_question_agent import get_ai_question_agent
+from app.services.question_templates import QUESTION_CODES, REFINEMENT_CODES, QuestionTemplates
+from app.utils.config import get_settings
 from app.utils.pii_safe_logging import get_pii_safe_logger
 
 logger = get_pii_safe_logger(__name__)
 
+def _build_template_question(template_q: Dict[str, Any]) -> Question:
+    """Build a validated Question from a standardized template dict."""
+    return Question(
+        code=template_q.get("code", ""),
+        text=template_q["text"],
+        why_it_matters=template_q["why_it_matters"],
+        choices=[
+            QuestionChoice(
+                id=choice["id"],
+                text=choice["text"],
+                description=choice.get("description", "")
+            )
+            for choice in template_q["choices"]
+        ],
+        required=template_q["required"],
+        allow_multiple=template_q["allow_multiple"],
+        category=template_q["category"]
+    )
+
+
+def _build_template_questions() -> Dict[str, Question]:
+    """Build one Question per standardized template, keyed by question text."""
+    template_dicts = [
+        *QuestionTemplates.get_mandatory_questions(),
+        QuestionTemplates.get_performance_question(),
+    ]
+    for domain, domain_config in QuestionTemplates.DOMAIN_TEMPLATES.items():
+        template_dicts.extend(QuestionTemplates.get_domain_questions(domain, max_questions=len(domain_config)))
+    for category_questions in QuestionTemplates.ADDITIONAL_QUESTIONS.values():
+        template_dicts.extend(category_questions)
+    return {template_q["text"]: _build_template_question(template_q) for template_q in template_dicts}
+
+
+# Validated Question objects for standardized templates, built once at import.
+# Templates are static; only the per-request code differs between responses.
+_TEMPLATE_QUESTIONS: Dict[str, Question] = _build_template_questions()
+
+
+def _question_from_template(template_q: Dict[str, Any]) -> Question:
+    """Get a Question for a standardized template dict from its prebuilt object."""
+    prebuilt = _TEMPLATE_QUESTIONS.get(template_q["text"])
+    if prebuilt is None:
+        return _build_template_question(template_q)
+    # Deep copy so callers never share the prebuilt choices list
+    return prebuilt.model_copy(update={"code": template_q["code"]}, deep=True)
+
+
+# Caps concurrent AI agent calls across all engines to stay under provider rate limits.
+# One per event loop, created on first use, since a semaphore binds to the loop it waits on.
+_AI_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_ai_semaphore() -> asyncio.Semaphore:
+    """Get the AI call semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _AI_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _AI_SEMAPHORES[loop] = asyncio.Semaphore(get_settings().question_ai_max_concurrency)
+    return semaphore
+
+
+# Generations currently running, per event loop and keyed by (description, total questions).
+# Module level because a QuestionEngine is created per request.
+_INFLIGHT_GENERATIONS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class _GenerationAborted(Exception):
+    """Set on a shared generation whose leader stopped without a result."""
+
+
+def _get_inflight_generations() -> Dict[Tuple[str, int], "asyncio.Future[List[Question]]"]:
+    """Get the in-flight generations of the running event loop."""
+    loop = asyncio.get_running_loop()
+    generations = _INFLIGHT_GENERATIONS.get(loop)
+    if generations is None:
+        generations = _INFLIGHT_GENERATIONS[loop] = {}
+    return generations
+
+
+# Static refinement questions used when AI generation fails, built once at import
+_FALLBACK_REFINEMENT_QUESTIONS: Tuple[Question, ...] = (
+    Question(
+        code="R001",
+        text="Qual é o nível de disponibilidade (SLA) esperado?",
+        why_it_matters="Define arquitetura de alta disponibilidade",
+        choices=[
+            QuestionChoice(id="sla_99", text="99% (3.65 dias/ano)"),
+            QuestionChoice(id="sla_999", text="99.9% (8.76 horas/ano)"),
+            QuestionChoice(id="sla_9999", text="99.99% (52 minutos/ano)")
+        ],
+        required=True,
+        allow_multiple=False,
+        category="refinement"
+    ),
+    Question(
+        code="R002",
+        text="Qual é o volume de usuários simultâneos esperado?",
+        why_it_matters="Define escalabilidade necessária",
+        choices=[
+            QuestionChoice(id="users_100", text="Até 100"),
+            QuestionChoice(id="users_1000", text="100-1000"),
+            QuestionChoice(id="users_10000", text="1000-10000"),
+            QuestionChoice(id="users_more", text="Mais de 10000")
+        ],
+        required=True,
+        allow_multiple=False,
+        category="refinement"
+    )
+)
+
 
 class QuestionEngine:
     """
@@ -25,7 +141,7 @@ class QuestionEngine:
     
     def __init__(self):
         """Initialize the question engine with AI agent and templates."""
-        self.ai_agent = AIQuestionAgent()
+        self.ai_agent = get_ai_question_agent()
         self.templates = QuestionTemplates()
         
         # Initialize Redis cache
@@ -72,6 +188,40 @@ class QuestionEngine:
                 # Return cached questions up to max_questions
                 return cached_questions[:max_questions]
         
+        # Share the result of an identical generation that is already running,
+        # so concurrent requests for one description make a single AI call
+        inflight_generations = _get_inflight_generations()
+        inflight_key = (project_description, total_questions)
+        inflight = inflight_generations.get(inflight_key)
+        while inflight is not None:
+            logger.info("⏳ Waiting for identical question generation already in progress")
+            try:
+                questions = await asyncio.shield(inflight)
+            except _GenerationAborted:
+                # The leader was cancelled; generate here unless another waiter already took over
+                inflight = inflight_generations.get(inflight_key)
+                continue
+            return [question.model_copy() for question in questions]
+        
+        inflight = asyncio.get_running_loop().create_future()
+        inflight_generations[inflight_key] = inflight
+        try:
+            questions = await self._generate_hybrid_questions(project_description, total_questions)
+            inflight.set_result(questions)
+            return questions
+        finally:
+            del inflight_generations[inflight_key]
+            if not inflight.done():
+                inflight.set_exception(_GenerationAborted())
+                # Mark it retrieved so a generation nobody waited on isn't logged
+                inflight.exception()
+    
+    async def _generate_hybrid_questions(
+        self,
+        project_description: str,
+        total_questions: int
+    ) -> List[Question]:
+        """Generate and cache hybrid questions for a description that missed the cache."""
         try:
             # STEP 1: Get standardized questions with quota enforcement
             standardized_questions = self.templates.get_contextual_questions(
@@ -82,47 +232,31 @@ class QuestionEngine:
             logger.info(f"📋 Generated {len(standardized_questions)} standardized questions (multiple choice)")
             
             # STEP 2: Convert template format to Question objects
-            questions = []
-            for i, template_q in enumerate(standardized_questions):
-                choices = [
-                    QuestionChoice(
-                        id=choice["id"],
-                        text=choice["text"],
-                        description=choice.get("description", "")
-                    )
-                    for choice in template_q["choices"]
-                ]
-                
-                question = Question(
-                    code=template_q["code"],
-                    text=template_q["text"],
-                    why_it_matters=template_q["why_it_matters"],
-                    choices=choices,
-                    required=template_q["required"],
-                    allow_multiple=template_q["allow_multiple"],
-                    category=template_q["category"]
-                )
-                questions.append(question)
+            questions = [
+                _question_from_template(template_q)
+                for template_q in standardized_questions
+            ]
             
             # STEP 3: Add AI-generated open questions if needed
             remaining_questions = total_questions - len(questions)
             if remaining_questions > 0:
                 logger.info(f"🤖 Generating {remaining_questions} AI open questions for context")
                 
-                ai_questions = await self.ai_agent.generate_questions(
-                    project_description=project_description,
-                    num_questions=remaining_questions,
-                    exclude_covered_topics=self._get_covered_topics(standardized_questions)
-                )
+                async with _get_ai_semaphore():
+                    ai_questions = await self.ai_agent.generate_questions(
+                        project_description=project_description,
+                        num_questions=remaining_questions,
+                        exclude_covered_topics=self._get_covered_topics(standardized_questions)
+                    )
                 
                 # Add AI questions with proper codes
                 for i, ai_q in enumerate(ai_questions):
-                    ai_q.code = f"Q{len(questions) + i + 1:03d}"
+                    ai_q.code = QUESTION_CODES[len(questions) + i]
                 
                 questions.extend(ai_questions)
             
             # STEP 4: Calculate and log the multiple choice ratio
-            mc_questions = len([q for q in questions if q.choices and len(q.choices) > 1])
+            mc_questions = sum(1 for q in questions if q.choices and len(q.choices) > 1)
             mc_ratio = (mc_questions / len(questions)) * 100 if questions else 0
             
             logger.info(f"✅ FINAL COMPOSITION: {len(questions)} questions, {mc_questions} multiple choice ({mc_ratio:.1f}%)")
@@ -142,27 +276,21 @@ class QuestionEngine:
             # Fallback: try pure AI generation
             logger.info("🔄 Falling back to pure AI generation")
             try:
-                return await self.ai_agent.generate_questions(
-                    project_description=project_description,
-                    num_questions=total_questions
-                )
+                async with _get_ai_semaphore():
+                    return await self.ai_agent.generate_questions(
+                        project_description=project_description,
+                        num_questions=total_questions
+                    )
             except Exception as fallback_e:
                 logger.error(f"Fallback also failed: {fallback_e}")
                 return []
     
     def _get_covered_topics(self, standardized_questions: List[Dict]) -> List[str]:
         """Extract topics already covered by standardized questions to avoid duplication."""
-        covered_topics = []
-        for q in standardized_questions:
-            question_text = q["text"].lower()
-            if "dispositivo" in question_text or "plataforma" in question_text:
-                covered_topics.append("platforms_devices")
-            elif "periférico" in question_text or "integração" in question_text:
-                covered_topics.append("integrations_peripherals")
-            elif "fiscal" in question_text or "regulament" in question_text:
-                covered_topics.append("compliance_regulations")
-        
-        return covered_topics
+        # Mandatory templates carry their topic_id; dict.fromkeys drops repeats in order
+        return list(dict.fromkeys(
+            q["topic_id"] for q in standardized_questions if q.get("topic_id")
+        ))
     
     async def generate_follow_up_questions(
         self, 
@@ -190,11 +318,12 @@ class QuestionEngine:
         
         try:
             # Generate contextual follow-up questions
-            questions = await self.ai_agent.generate_followup_questions(
-                project_description=project_description,
-                previous_answers=previous_answers,
-                num_questions=3  # Fewer questions for follow-ups
-            )
+            async with _get_ai_semaphore():
+                questions = await self.ai_agent.generate_followup_questions(
+                    project_description=project_description,
+                    previous_answers=previous_answers,
+                    num_questions=3  # Fewer questions for follow-ups
+                )
             
             logger.info(f"Generated {len(questions)} follow-up questions")
             return questions
@@ -226,16 +355,17 @@ class QuestionEngine:
             logger.info(f"🔄 Generating {num_questions} refinement questions based on feedback")
             
             # Use AI agent to generate contextual refinement questions
-            questions = await self.ai_agent.generate_refinement_questions(
-                project_description=project_description,
-                summary=summary,
-                feedback=feedback,
-                num_questions=num_questions
-            )
+            async with _get_ai_semaphore():
+                questions = await self.ai_agent.generate_refinement_questions(
+                    project_description=project_description,
+                    summary=summary,
+                    feedback=feedback,
+                    num_questions=num_questions
+                )
             
             # Add refinement-specific codes
             for i, q in enumerate(questions):
-                q.code = f"R{i+1:03d}"
+                q.code = REFINEMENT_CODES[i]
                 q.category = "refinement"
             
             logger.info(f"✅ Generated {len(questions)} refinement questions")
@@ -248,36 +378,4 @@ class QuestionEngine:
     
     def _get_fallback_refinement_questions(self, feedback: Optional[str] = None) -> List[Question]:
         """Get fallback refinement questions when AI fails."""
-        from app.models.api_models import QuestionChoice
-        
-        questions = [
-            Question(
-                code="R001",
-                text="Qual é o nível de disponibilidade (SLA) esperado?",
-                why_it_matters="Define arquitetura de alta disponibilidade",
-                choices=[
-                    QuestionChoice(id="sla_99", text="99% (3.65 dias/ano)"),
-                    QuestionChoice(id="sla_999", text="99.9% (8.76 horas/ano)"),
-                    QuestionChoice(id="sla_9999", text="99.99% (52 minutos/ano)")
-                ],
-                required=True,
-                allow_multiple=False,
-                category="refinement"
-            ),
-            Question(
-                code="R002",
-                text="Qual é o volume de usuários simultâneos esperado?",
-                why_it_matters="Define escalabilidade necessária",
-                choices=[
-                    QuestionChoice(id="users_100", text="Até 100"),
-                    QuestionChoice(id="users_1000", text="100-1000"),
-                    QuestionChoice(id="users_10000", text="1000-10000"),
-                    QuestionChoice(id="users_more", text="Mais de 10000")
-                ],
-                required=True,
-                allow_multiple=False,
-                category="refinement"
-            )
-        ]
-        
-        return questions
\ No newline at end of file
+        return [question.model_copy() for question in _FALLBACK_REFINEMENT_QUESTIONS]
\ No newline at end of file
@@ -7,7 +7,12 @@ from typing import Dict, List, Any
 from dataclasses import dataclass
 
 
-@dataclass
+# Question codes Q001-Q999 and refinement codes R001-R999, indexed from zero
+QUESTION_CODES = tuple(f"Q{i:03d}" for i in range(1, 1000))
+REFINEMENT_CODES = tuple(f"R{i:03d}" for i in range(1, 1000))
+
+
+@dataclass(frozen=True, slots=True)
 class OptionTemplate:
     """Template for a standardized question option."""
     id: str
@@ -18,9 +23,11 @@ class OptionTemplate:
 class QuestionTemplates:
     """Centralized repository of standardized question templates by domain."""
     
-    # Mandatory Coverage Areas - Must be addressed in every project
+    # Mandatory Coverage Areas - Must be addressed in every project.
+    # topic_id tells the AI agent which topics are already covered.
     MANDATORY_COVERAGE = {
         "devices": {
+            "topic_id": "platforms_devices",
             "question": "Em quais dispositivos o sistema deve funcionar?",
             "why_it_matters": "Define a estratégia de desenvolvimento (responsivo, nativo, híbrido) e impacta custos e cronograma significativamente.",
             "options": [
@@ -34,6 +41,7 @@ class QuestionTemplates:
         },
         
         "peripherals": {
+            "topic_id": "integrations_peripherals",
             "question": "Quais periféricos e integrações externas são necessários?",
             "why_it_matters": "Periféricos específicos podem exigir drivers especiais, APIs dedicadas e testes específicos, afetando arquitetura e custos.",
             "options": [
@@ -49,6 +57,7 @@ class QuestionTemplates:
         },
         
         "fiscal_compliance": {
+            "topic_id": "compliance_regulations",
             "question": "Que obrigações fiscais e regulamentárias o sistema deve atender?",
             "why_it_matters": "Compliance fiscal é obrigatório no Brasil e requer integrações específicas com Receita Federal, podendo representar 20-30% do desenvolvimento.",
             "options": [
@@ -66,6 +75,7 @@ class QuestionTemplates:
         },
         
         "integrations": {
+            "topic_id": "integrations_peripherals",
             "question": "Com quais sistemas externos o projeto precisa se integrar?",
             "why_it_matters": "Integrações definem a complexidade da arquitetura e podem ser o maior desafio técnico, exigindo APIs, autenticação e sincronização de dados.",
             "options": [
@@ -95,6 +105,15 @@ class QuestionTemplates:
         ]
     }
     
+    # Domain detection keywords, matched as substrings of the lowercased description
+    DOMAIN_KEYWORDS = {
+        "financial": ("bancário", "banco", "fintech", "pagamento", "pix", "cartão", "empréstimo", "financeiro", "investimento", "corretora", "trading"),
+        "healthcare": ("médico", "hospitalar", "clínica", "saúde", "paciente", "prontuário", "telemedicina", "exame"),
+        "ecommerce": ("e-commerce", "loja", "vendas", "produto", "carrinho", "delivery", "varejo"),
+        "education": ("educação", "ensino", "curso", "aula", "aprendizagem", "treinamento", "e-learning"),
+        "marketplace": ("marketplace", "freelancer", "freelancers", "plataforma", "serviços", "matching", "gig economy", "talents", "profissionais")
+    }
+    
     # Domain-specific Templates
     DOMAIN_TEMPLATES = {
         "financial": {
@@ -242,6 +261,73 @@ class QuestionTemplates:
         }
     }
     
+    # Extra questions used to top up categories below their quota
+    ADDITIONAL_QUESTIONS = {
+        "operational": [
+            {
+                "category": "operational",
+                "text": "Como será feita a operação diária e monitoramento do sistema?",
+                "why_it_matters": "Define processos operacionais, dashboards de monitoramento e procedures de manutenção necessários.",
+                "required": True,
+                "allow_multiple": True,
+                "choices": [
+                    {"id": "auto_monitoring", "text": "Monitoramento Automático", "description": "Alertas e dashboards automatizados"},
+                    {"id": "manual_ops", "text": "Operação Manual", "description": "Equipe dedicada para monitoramento"},
+                    {"id": "hybrid_ops", "text": "Operação Híbrida", "description": "Automação + supervisão humana"},
+                    {"id": "outsourced_ops", "text": "Operação Terceirizada", "description": "Empresa especializada em operação"},
+                    {"id": "self_service", "text": "Self-Service", "description": "Usuários resolvem problemas sozinhos"}
+                ]
+            },
+            {
+                "category": "operational", 
+                "text": "Qual será a estratégia de backup e disaster recovery?",
+                "why_it_matters": "Define RTO/RPO, infraestrutura de backup e procedures de contingência para garantir continuidade do negócio.",
+                "required": True,
+                "allow_multiple": False,
+                "choices": [
+                    {"id": "basic_backup", "text": "Backup Básico", "description": "Backup diário, RTO 24h"},
+                    {"id": "standard_dr", "text": "DR Padrão", "description": "Backup contínuo, RTO 4h"},
+                    {"id": "advanced_dr", "text": "DR Avançado", "description": "Hot standby, RTO 1h"},
+                    {"id": "enterprise_dr", "text": "DR Enterprise", "description": "Multi-region, RTO 15min"},
+                    {"id": "custom_dr", "text": "DR Customizado", "description": "Estratégia específica do projeto"}
+                ]
+            }
+        ],
+        "business": [
+            {
+                "category": "business",
+                "text": "Qual é o modelo de monetização principal do projeto?",
+                "why_it_matters": "Define arquitetura de cobrança, integrações de pagamento e métricas de sucesso do negócio.",
+                "required": True,
+                "allow_multiple": False,
+                "choices": [
+                    {"id": "subscription", "text": "Assinatura Mensal/Anual", "description": "Receita recorrente"},
+                    {"id": "freemium", "text": "Freemium", "description": "Básico grátis + premium pago"},
+                    {"id": "transaction_fee", "text": "Taxa por Transação", "description": "Comissão sobre vendas"},
+                    {"id": "advertising", "text": "Publicidade", "description": "Revenue de anúncios"},
+                    {"id": "one_time", "text": "Pagamento Único", "description": "Compra única do software"},
+                    {"id": "custom_model", "text": "Modelo Customizado", "description": "Combinação ou modelo específico"}
+                ]
+            }
+        ],
+        "technical": [
+            {
+                "category": "technical",
+                "text": "Qual será a estratégia de escalabilidade e arquitetura?",
+                "why_it_matters": "Define se a arquitetura suportará crescimento futuro e quais tecnologias usar para alta disponibilidade.",
+                "required": True,
+                "allow_multiple": False,
+                "choices": [
+                    {"id": "monolith", "text": "Arquitetura Monolítica", "description": "Aplicação única, deploy simples"},
+                    {"id": "microservices", "text": "Microserviços", "description": "Serviços independentes, alta escalabilidade"},
+                    {"id": "serverless", "text": "Serverless", "description": "Functions as a Service, escala automática"},
+                    {"id": "containers", "text": "Containers", "description": "Docker/Kubernetes, orquestração"},
+                    {"id": "hybrid_arch", "text": "Arquitetura Híbrida", "description": "Combinação de estratégias"}
+                ]
+            }
+        ]
+    }
+    
     @classmethod
     def get_mandatory_questions(cls) -> List[Dict[str, Any]]:
         """Get all mandatory coverage questions that must be included in every project."""
@@ -250,6 +336,7 @@ class QuestionTemplates:
         for coverage_area, config in cls.MANDATORY_COVERAGE.items():
             question = {
                 "category": "technical",
+                "topic_id": config["topic_id"],
                 "text": config["question"],
                 "why_it_matters": config["why_it_matters"],
                 "required": True,
@@ -305,26 +392,16 @@ class QuestionTemplates:
         """Detect the most likely domain based on project description keywords."""
         description_lower = project_description.lower()
         
-        # Domain detection keywords
-        domain_keywords = {
-            "financial": ["bancário", "banco", "fintech", "pagamento", "pix", "cartão", "empréstimo", "financeiro", "investimento", "corretora", "trading"],
-            "healthcare": ["médico", "hospitalar", "clínica", "saúde", "paciente", "prontuário", "telemedicina", "exame"],
-            "ecommerce": ["e-commerce", "loja", "vendas", "produto", "carrinho", "delivery", "varejo"],
-            "education": ["educação", "ensino", "curso", "aula", "aprendizagem", "treinamento", "e-learning"],
-            "marketplace": ["marketplace", "freelancer", "freelancers", "plataforma", "serviços", "matching", "gig economy", "talents", "profissionais"]
-        }
-        
-        # Count keyword matches for each domain
-        domain_scores = {}
-        for domain, keywords in domain_keywords.items():
+        # Count keyword matches for each domain, keeping the first highest score
+        best_domain = "general"
+        best_score = 0
+        for domain, keywords in cls.DOMAIN_KEYWORDS.items():
             score = sum(1 for keyword in keywords if keyword in description_lower)
-            domain_scores[domain] = score
-        
-        # Return domain with highest score, or None if no clear match
-        if max(domain_scores.values()) > 0:
-            return max(domain_scores.items(), key=lambda x: x[1])[0]
+            if score > best_score:
+                best_domain, best_score = domain, score
         
-        return "general"
+        # Domain with highest score, or "general" if no keyword matched
+        return best_domain
     
     @classmethod
     def get_performance_question(cls) -> Dict[str, Any]:
@@ -379,7 +456,7 @@ class QuestionTemplates:
         
         # Step 5: Add question codes
         for i, question in enumerate(questions):
-            question["code"] = f"Q{i+1:03d}"
+            question["code"] = QUESTION_CODES[i]
         
         return questions[:total_questions]
     
@@ -419,81 +496,5 @@ class QuestionTemplates:
     @classmethod 
     def _generate_additional_questions(cls, category: str, count: int) -> List[Dict[str, Any]]:
         """Generate additional questions to meet category quotas."""
-        additional = []
-        
-        if category == "operational":
-            # Additional operational questions
-            ops_questions = [
-                {
-                    "category": "operational",
-                    "text": "Como será feita a operação diária e monitoramento do sistema?",
-                    "why_it_matters": "Define processos operacionais, dashboards de monitoramento e procedures de manutenção necessários.",
-                    "required": True,
-                    "allow_multiple": True,
-                    "choices": [
-                        {"id": "auto_monitoring", "text": "Monitoramento Automático", "description": "Alertas e dashboards automatizados"},
-                        {"id": "manual_ops", "text": "Operação Manual", "description": "Equipe dedicada para monitoramento"},
-                        {"id": "hybrid_ops", "text": "Operação Híbrida", "description": "Automação + supervisão humana"},
-                        {"id": "outsourced_ops", "text": "Operação Terceirizada", "description": "Empresa especializada em operação"},
-                        {"id": "self_service", "text": "Self-Service", "description": "Usuários resolvem problemas sozinhos"}
-                    ]
-                },
-                {
-                    "category": "operational", 
-                    "text": "Qual será a estratégia de backup e disaster recovery?",
-                    "why_it_matters": "Define RTO/RPO, infraestrutura de backup e procedures de contingência para garantir continuidade do negócio.",
-                    "required": True,
-                    "allow_multiple": False,
-                    "choices": [
-                        {"id": "basic_backup", "text": "Backup Básico", "description": "Backup diário, RTO 24h"},
-                        {"id": "standard_dr", "text": "DR Padrão", "description": "Backup contínuo, RTO 4h"},
-                        {"id": "advanced_dr", "text": "DR Avançado", "description": "Hot standby, RTO 1h"},
-                        {"id": "enterprise_dr", "text": "DR Enterprise", "description": "Multi-region, RTO 15min"},
-                        {"id": "custom_dr", "text": "DR Customizado", "description": "Estratégia específica do projeto"}
-                    ]
-                }
-            ]
-            additional.extend(ops_questions[:count])
-            
-        elif category == "business":
-            # Additional business questions  
-            biz_questions = [
-                {
-                    "category": "business",
-                    "text": "Qual é o modelo de monetização principal do projeto?",
-                    "why_it_matters": "Define arquitetura de cobrança, integrações de pagamento e métricas de sucesso do negócio.",
-                    "required": True,
-                    "allow_multiple": False,
-                    "choices": [
-                        {"id": "subscription", "text": "Assinatura Mensal/Anual", "description": "Receita recorrente"},
-                        {"id": "freemium", "text": "Freemium", "description": "Básico grátis + premium pago"},
-                        {"id": "transaction_fee", "text": "Taxa por Transação", "description": "Comissão sobre vendas"},
-                        {"id": "advertising", "text": "Publicidade", "description": "Revenue de anúncios"},
-                        {"id": "one_time", "text": "Pagamento Único", "description": "Compra única do software"},
-                        {"id": "custom_model", "text": "Modelo Customizado", "description": "Combinação ou modelo específico"}
-                    ]
-                }
-            ]
-            additional.extend(biz_questions[:count])
-            
-        elif category == "technical":
-            # Additional technical questions
-            tech_questions = [
-                {
-                    "category": "technical",
-                    "text": "Qual será a estratégia de escalabilidade e arquitetura?",
-                    "why_it_matters": "Define se a arquitetura suportará crescimento futuro e quais tecnologias usar para alta disponibilidade.",
-                    "required": True,
-                    "allow_multiple": False,
-                    "choices": [
-                        {"id": "monolith", "text": "Arquitetura Monolítica", "description": "Aplicação única, deploy simples"},
-                        {"id": "microservices", "text": "Microserviços", "description": "Serviços independentes, alta escalabilidade"},
-                        {"id": "serverless", "text": "Serverless", "description": "Functions as a Service, escala automática"},
-                        {"id": "containers", "text": "Containers", "description": "Docker/Kubernetes, orquestração"},
-                        {"id": "hybrid_arch", "text": "Arquitetura Híbrida", "description": "Combinação de estratégias"}
-                    ]
-                }
-            ]
-            additional.extend(tech_questions[:count])
-        
-        return additional
\ No newline at end of file
+        # Copy the templates so adding codes later doesn't change the class constant
+        return [dict(question) for question in cls.ADDITIONAL_QUESTIONS.get(category, [])[:count]]
\ No newline at end of file
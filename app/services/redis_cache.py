@@ -10,7 +10,8 @@ from typing import Dict, List, Optional, Any
 from datetime import timedelta
 import redis.asyncio as aioredis
 import redis
-from redis.exceptions import RedisError
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from pydantic import TypeAdapter
 
 from app.models.api_models import Question, StackDocumentation
 from app.utils.pii_safe_logging import get_pii_safe_logger
@@ -18,6 +19,9 @@ from app.utils.config import get_settings
 
 logger = get_pii_safe_logger(__name__)
 
+# Validates a whole cached question list in one call
+_QUESTION_LIST_ADAPTER = TypeAdapter(List[Question])
+
 
 class RedisCache:
     """
@@ -65,8 +69,10 @@ class RedisCache:
             self._async_client = aioredis.Redis(**connection_config)
             
             # Create sync client with timeout adjustments
-            sync_config = connection_config.copy()
-            sync_config["socket_connect_timeout"] = self.settings.redis_connection_timeout
+            sync_config = {
+                **connection_config,
+                "socket_connect_timeout": self.settings.redis_connection_timeout,
+            }
             self._sync_client = redis.Redis(**sync_config)
 
             # Verify connection
@@ -163,19 +169,24 @@ class RedisCache:
         return f"{self.settings.redis_host}:{self.settings.redis_port}/{self.settings.redis_db}{ssl_suffix}"
 
     async def _ensure_connection(self) -> bool:
-        """Verify Redis connection is active and healthy."""
+        """
+        Check whether Redis should be used for the next operation.
+
+        Doesn't PING on every call, which would double the round trips of each
+        cache access. Idle connections are already checked by the client's
+        health_check_interval, and failed operations report lost connections
+        through _handle_redis_error.
+        """
         if not self.cache_enabled:
             return False
 
-        if self._is_connected and self._async_client:
-            try:
-                await self._async_client.ping()
-                return True
-            except (RedisError, ConnectionError):
-                self._is_connected = False
-                logger.warning("Redis connection lost, switching to memory cache")
+        return self._is_connected and self._async_client is not None
 
-        return False
+    def _handle_redis_error(self, error: Exception) -> None:
+        """Switch to memory cache if a Redis operation failed because the connection is gone."""
+        if isinstance(error, (RedisConnectionError, RedisTimeoutError, ConnectionError)):
+            self._is_connected = False
+            logger.warning("Redis connection lost, switching to memory cache")
 
     def _create_cache_key(self, prefix: str, identifier: str) -> str:
         """Create namespaced cache key."""
@@ -227,14 +238,14 @@ class RedisCache:
             if not cached_data:
                 return None
                 
-            questions_data = json.loads(cached_data)
-            questions = [Question(**q) for q in questions_data]
+            questions = _QUESTION_LIST_ADAPTER.validate_json(cached_data)
             
             logger.info(f"✅ Questions retrieved from Redis (key: {cache_key[:20]}...)")
             return questions
             
         except Exception as error:
             logger.error(f"Redis retrieval error: {error}")
+            self._handle_redis_error(error)
             return None
     
     def _get_questions_from_memory(self, cache_key: str) -> Optional[List[Question]]:
@@ -246,8 +257,7 @@ class RedisCache:
         if not self._is_memory_entry_valid(cache_entry):
             return None
             
-        questions_data = cache_entry["data"]
-        questions = [Question(**q) for q in questions_data]
+        questions = _QUESTION_LIST_ADAPTER.validate_python(cache_entry["data"])
         
         logger.info(f"✅ Questions retrieved from memory (key: {cache_key[:20]}...)")
         return questions
@@ -294,6 +304,7 @@ class RedisCache:
             return True
         except Exception as error:
             logger.error(f"Redis caching error: {error}")
+            self._handle_redis_error(error)
             return False
     
     def _cache_questions_to_memory(self, cache_key: str, questions_data: List[Dict], ttl: int) -> bool:
@@ -353,6 +364,7 @@ class RedisCache:
             
         except Exception as error:
             logger.error(f"Redis document retrieval error: {error}")
+            self._handle_redis_error(error)
             return None
     
     def _get_document_from_memory(self, cache_key: str, session_id: str) -> Optional[Dict[str, Any]]:
@@ -415,6 +427,7 @@ class RedisCache:
             return True
         except Exception as error:
             logger.error(f"Redis document caching error: {error}")
+            self._handle_redis_error(error)
             return False
     
     def _cache_document_to_memory(self, cache_key: str, document_data: Dict[str, Any], ttl: int, session_id: str) -> bool:
@@ -463,6 +476,7 @@ class RedisCache:
             logger.info(f"✅ Document invalidated in Redis (session: {session_id[:8]}...)")
         except Exception as error:
             logger.error(f"Redis invalidation error: {error}")
+            self._handle_redis_error(error)
     
     def _invalidate_memory_document(self, cache_key: str, session_id: str) -> None:
         """Remove document from memory cache."""
@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     question_cache_ttl_seconds: int = 3600
     question_generation_temperature: float = 0.5
     question_generation_max_tokens: int = 2048
+    question_ai_max_concurrency: int = 8  # Concurrent AI calls from the question engine
 
     # Storage Configuration
     use_local_storage: bool = True
@@ -0,0 +1,52 @@
+"""
+Unit tests for the AI question agent.
+Covers how the shared agent follows the global provider and cache.
+"""
+
+import pytest
+
+from app.services import ai_factory, ai_question_agent
+from app.services.ai_question_agent import AIQuestionAgent, get_ai_question_agent
+from app.services.question_cache import clear_question_cache, get_question_cache
+
+
+class FakeProvider:
+    """AI provider stand-in that only reports a model name."""
+
+    def get_model_name(self) -> str:
+        return "fake-model"
+
+
+class TestSharedAgent:
+    """Test the shared agent picks up global provider and cache changes."""
+
+    def test_follows_set_ai_provider(self, monkeypatch):
+        """Test set_ai_provider() reaches an agent created before it."""
+        monkeypatch.setattr(ai_factory, "_default_provider", FakeProvider())
+        agent = get_ai_question_agent()
+
+        provider = FakeProvider()
+        ai_factory.set_ai_provider(provider)
+
+        assert agent.ai_provider is provider
+        assert get_ai_question_agent() is agent
+
+    def test_follows_clear_question_cache(self):
+        """Test clear_question_cache() reaches an agent created before it."""
+        agent = get_ai_question_agent()
+        previous = agent.cache
+
+        clear_question_cache()
+
+        assert agent.cache is not previous
+        assert agent.cache is get_question_cache()
+
+    def test_invalid_provider_config_fails_on_construction(self, monkeypatch):
+        """Test a provider that can't be created fails when the agent is built, not on first use."""
+        def broken_provider():
+            raise ValueError("GEMINI_API_KEY not configured")
+
+        monkeypatch.setattr(ai_question_agent, "get_ai_provider", broken_provider)
+
+        with pytest.raises(ValueError):
+            AIQuestionAgent()
@@ -0,0 +1,229 @@
+"""
+Unit tests for the in-memory question cache.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.api_models import Question, QuestionChoice
+from app.services import question_cache
+from app.services.question_cache import (
+    QuestionCache,
+    clear_question_cache,
+    get_question_cache,
+)
+
+
+def make_questions(code: str):
+    """Build a one-question list tagged with the given code."""
+    return [
+        Question(
+            code=code,
+            text="Pergunta de teste?",
+            why_it_matters="Teste",
+            choices=[QuestionChoice(id="sim", text="Sim")],
+            category="business",
+        )
+    ]
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the cache module's clock by hand."""
+    fake = FakeClock()
+    monkeypatch.setattr(question_cache, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+class TestLRUEviction:
+    """Test least recently used eviction order."""
+
+    def test_oldest_entry_evicted_when_full(self):
+        """Test the entry stored first is evicted once the cache is full."""
+        cache = QuestionCache(max_entries=2, ttl_seconds=3600, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+        cache.put("loja virtual roupas", make_questions("Q2"))
+        cache.put("delivery restaurante pedidos", make_questions("Q3"))
+
+        assert cache.get("clinica medica agendamento") is None
+        assert cache.get("loja virtual roupas")[0].code == "Q2"
+        assert cache.get("delivery restaurante pedidos")[0].code == "Q3"
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_hit_refreshes_recency(self):
+        """Test a cache hit moves the entry away from the eviction end."""
+        cache = QuestionCache(max_entries=2, ttl_seconds=3600, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+        cache.put("loja virtual roupas", make_questions("Q2"))
+
+        assert cache.get("clinica medica agendamento")[0].code == "Q1"
+        cache.put("delivery restaurante pedidos", make_questions("Q3"))
+
+        assert cache.get("loja virtual roupas") is None
+        assert cache.get("clinica medica agendamento")[0].code == "Q1"
+
+    def test_similar_hit_refreshes_recency(self):
+        """Test a similarity hit also counts as a use of the matched entry."""
+        cache = QuestionCache(max_entries=2, ttl_seconds=3600, similarity_threshold=0.5)
+        cache.put("clinica medica agendamento pacientes", make_questions("Q1"))
+        cache.put("loja virtual roupas", make_questions("Q2"))
+
+        assert cache.get("clinica medica agendamento consultas")[0].code == "Q1"
+        cache.put("delivery restaurante pedidos", make_questions("Q3"))
+
+        assert cache.get("loja virtual roupas") is None
+        assert cache.get("clinica medica agendamento pacientes")[0].code == "Q1"
+
+    def test_evicted_entry_leaves_keyword_index(self):
+        """Test eviction removes the entry's keywords from the index."""
+        cache = QuestionCache(max_entries=1, ttl_seconds=3600, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+        cache.put("loja virtual roupas", make_questions("Q2"))
+
+        assert set(cache.keyword_index) == {"loja", "virtual", "roupas"}
+
+
+class TestTTLExpiry:
+    """Test time-based expiry driven by the expiry heap."""
+
+    def test_entry_expires_after_ttl(self, clock):
+        """Test an entry is served before its TTL and dropped after it."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+
+        clock.now += 59
+        assert cache.get("clinica medica agendamento")[0].code == "Q1"
+
+        clock.now += 2
+        assert cache.get("clinica medica agendamento") is None
+        assert len(cache.cache) == 0
+        assert not cache.keyword_index
+        assert not cache._expiry_heap
+
+    def test_stored_again_entry_survives_stale_heap_item(self, clock):
+        """Test the first expiry of an entry stored twice doesn't remove the newer copy."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+
+        clock.now += 30
+        cache.put("clinica medica agendamento", make_questions("Q2"))
+
+        clock.now += 40
+        assert cache.get("clinica medica agendamento")[0].code == "Q2"
+
+        clock.now += 30
+        assert cache.get("clinica medica agendamento") is None
+
+    def test_only_expired_entries_removed(self, clock):
+        """Test expiry removes old entries and keeps newer ones."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+        clock.now += 30
+        cache.put("loja virtual roupas", make_questions("Q2"))
+
+        clock.now += 40
+        assert cache.get("clinica medica agendamento") is None
+        assert cache.get("loja virtual roupas")[0].code == "Q2"
+        assert list(cache.cache) == [cache._generate_project_hash(["loja", "virtual", "roupas"])]
+
+
+class TestSimilarityLookup:
+    """Test similarity-based lookup and its candidate pruning."""
+
+    def test_similar_description_hits(self):
+        """Test a description sharing enough keywords reuses cached questions."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=3600, similarity_threshold=0.5)
+        cache.put("clinica medica agendamento pacientes", make_questions("Q1"))
+
+        assert cache.get("clinica medica agendamento consultas")[0].code == "Q1"
+
+    def test_dissimilar_description_misses(self):
+        """Test a description below the threshold is a miss."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=3600, similarity_threshold=0.5)
+        cache.put("clinica medica agendamento pacientes", make_questions("Q1"))
+
+        assert cache.get("clinica veterinaria vacinas animais") is None
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.parametrize("threshold", [0.2, 0.4, 0.6, 0.8])
+    def test_pruning_matches_full_scan(self, threshold):
+        """Test pruned lookup finds the same best similarity as scanning every entry."""
+        rng = random.Random(threshold)
+        vocabulary = [
+            "clinica", "medica", "agendamento", "pacientes", "loja", "virtual",
+            "roupas", "pagamento", "delivery", "restaurante", "pedidos", "cursos",
+            "online", "alunos", "estoque", "financeiro",
+        ]
+        cache = QuestionCache(max_entries=100, ttl_seconds=3600, similarity_threshold=threshold)
+        for index in range(40):
+            words = rng.sample(vocabulary, rng.randint(1, 8))
+            cache.put(" ".join(words), make_questions(f"Q{index}"))
+
+        for _ in range(100):
+            words = rng.sample(vocabulary, rng.randint(1, 8))
+            keywords = cache._extract_keywords(words)
+
+            best = max(
+                (cache._calculate_similarity(keywords, entry.keywords) for entry in cache.cache.values()),
+                default=0.0,
+            )
+            match = cache._find_similar_entry(keywords)
+
+            if best >= threshold and best > 0:
+                assert match is not None
+                assert match[1] == pytest.approx(best)
+            else:
+                assert match is None
+
+
+class TestInvalidation:
+    """Test explicit invalidation and the global cache instance."""
+
+    def test_invalidate_single_entry(self):
+        """Test invalidating one description keeps the others."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=3600, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+        cache.put("loja virtual roupas", make_questions("Q2"))
+
+        cache.invalidate("clinica  medica agendamento")
+
+        assert cache.get("clinica medica agendamento") is None
+        assert cache.get("loja virtual roupas")[0].code == "Q2"
+        assert set(cache.keyword_index) == {"loja", "virtual", "roupas"}
+
+    def test_invalidate_all(self):
+        """Test invalidating without a description clears everything."""
+        cache = QuestionCache(max_entries=10, ttl_seconds=3600, similarity_threshold=0.9)
+        cache.put("clinica medica agendamento", make_questions("Q1"))
+
+        cache.invalidate()
+
+        assert not cache.cache
+        assert not cache.keyword_index
+        assert not cache._expiry_heap
+
+    def test_clear_question_cache_resets_global_instance(self):
+        """Test clearing the global cache returns a fresh instance afterwards."""
+        clear_question_cache()
+        first = get_question_cache()
+        first.put("clinica medica agendamento", make_questions("Q1"))
+
+        clear_question_cache()
+        second = get_question_cache()
+
+        assert second is not first
+        assert not first.cache
+        assert second.get("clinica medica agendamento") is None
+        clear_question_cache()
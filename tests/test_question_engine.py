@@ -0,0 +1,239 @@
+"""
+Unit tests for the question engine.
+Covers prebuilt template questions and sharing of identical in-flight generations.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.api_models import Question
+from app.services import question_engine
+from app.services.question_engine import QuestionEngine
+from app.services.question_templates import QuestionTemplates
+
+PROJECT_DESCRIPTION = "Um projeto qualquer descrito sem palavras de nenhum domínio conhecido"
+
+
+class FakeAgent:
+    """AI question agent stand-in that counts calls and can be held open."""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = None
+        self.release = None
+
+    async def generate_questions(self, project_description, num_questions, exclude_covered_topics=None):
+        self.calls += 1
+        if self.started is not None:
+            self.started.set()
+        if self.release is not None:
+            await self.release.wait()
+        else:
+            await asyncio.sleep(0.05)
+        return [
+            Question(code="X", text=f"Pergunta aberta {i}?", why_it_matters="Contexto", choices=[], category="business")
+            for i in range(num_questions)
+        ]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Build engines around a fake agent and without Redis."""
+    fake = FakeAgent()
+    monkeypatch.setattr(question_engine, "get_ai_question_agent", lambda: fake)
+    monkeypatch.setattr("app.services.redis_cache.get_redis_cache", lambda: None)
+    return fake
+
+
+class TestTemplateQuestions:
+    """Test the Question objects prebuilt from standardized templates."""
+
+    def test_every_template_prebuilt_at_import(self):
+        """Test each standardized template has a prebuilt Question."""
+        templates = QuestionTemplates.get_contextual_questions("Loja virtual com carrinho e delivery", 20)
+
+        assert all(template["text"] in question_engine._TEMPLATE_QUESTIONS for template in templates)
+
+    def test_returned_questions_do_not_share_choices(self):
+        """Test editing one returned question leaves later ones unchanged."""
+        template = QuestionTemplates.get_contextual_questions(PROJECT_DESCRIPTION, 8)[0]
+
+        first = question_engine._question_from_template(template)
+        first.choices[0].text = "Alterado"
+        first.choices.clear()
+        second = question_engine._question_from_template(template)
+
+        assert second.code == template["code"]
+        assert [choice.id for choice in second.choices] == [choice["id"] for choice in template["choices"]]
+        assert second.choices[0].text == template["choices"][0]["text"]
+
+
+class TestInflightGenerations:
+    """Test that identical concurrent generations share one AI call."""
+
+    def test_concurrent_identical_requests_share_generation(self, agent):
+        """Test concurrent requests for one description make a single AI call."""
+        async def run():
+            engines = [QuestionEngine() for _ in range(5)]
+            results = await asyncio.gather(*[
+                engine.generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+                for engine in engines
+            ])
+            return results, dict(question_engine._get_inflight_generations())
+
+        results, inflight = asyncio.run(run())
+
+        assert agent.calls == 1
+        assert all(len(questions) == 8 for questions in results)
+        assert all(
+            [q.code for q in questions] == [q.code for q in results[0]]
+            for questions in results
+        )
+        # Waiters get their own copies, so changing one result doesn't leak into another
+        assert results[1][-1] is not results[0][-1]
+        assert inflight == {}
+
+    def test_different_requests_not_shared(self, agent):
+        """Test requests for different question counts generate separately."""
+        async def run():
+            engine = QuestionEngine()
+            return await asyncio.gather(
+                engine.generate_questions_for_project(PROJECT_DESCRIPTION, 8),
+                engine.generate_questions_for_project(PROJECT_DESCRIPTION, 10),
+            )
+
+        eight, ten = asyncio.run(run())
+
+        assert agent.calls == 2
+        assert (len(eight), len(ten)) == (8, 10)
+
+    def test_waiter_generates_when_leader_cancelled(self, agent):
+        """Test a waiter still gets questions when the request it waited on is cancelled."""
+        async def run():
+            agent.started = asyncio.Event()
+            agent.release = asyncio.Event()
+
+            leader = asyncio.create_task(
+                QuestionEngine().generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+            )
+            await asyncio.wait_for(agent.started.wait(), timeout=5)
+            follower = asyncio.create_task(
+                QuestionEngine().generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+            )
+            await asyncio.sleep(0)
+
+            agent.started.clear()
+            leader.cancel()
+            await asyncio.wait_for(agent.started.wait(), timeout=5)
+            agent.release.set()
+
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        questions = asyncio.run(run())
+
+        assert agent.calls == 2
+        assert len(questions) == 8
+
+    def test_waiter_cancellation_leaves_leader_running(self, agent):
+        """Test cancelling a waiter doesn't cancel the shared generation."""
+        async def run():
+            agent.started = asyncio.Event()
+            agent.release = asyncio.Event()
+
+            leader = asyncio.create_task(
+                QuestionEngine().generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+            )
+            await asyncio.wait_for(agent.started.wait(), timeout=5)
+            follower = asyncio.create_task(
+                QuestionEngine().generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+            )
+            await asyncio.sleep(0)
+
+            follower.cancel()
+            agent.release.set()
+
+            with pytest.raises(asyncio.CancelledError):
+                await follower
+            return await leader
+
+        questions = asyncio.run(run())
+
+        assert agent.calls == 1
+        assert len(questions) == 8
+
+    def test_generations_not_shared_across_event_loops(self, agent):
+        """Test identical requests on separate event loops each generate their own questions."""
+        both_started = threading.Barrier(2, timeout=5)
+        lock = threading.Lock()
+        results = []
+
+        async def generate():
+            return await QuestionEngine().generate_questions_for_project(PROJECT_DESCRIPTION, 8)
+
+        original = agent.generate_questions
+
+        async def generate_questions(*args, **kwargs):
+            # Hold both loops inside the AI call at the same time
+            await asyncio.get_running_loop().run_in_executor(None, both_started.wait)
+            return await original(*args, **kwargs)
+
+        agent.generate_questions = generate_questions
+
+        def worker():
+            questions = asyncio.run(generate())
+            with lock:
+                results.append(questions)
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert agent.calls == 2
+        assert [len(questions) for questions in results] == [8, 8]
+
+
+class TestAISemaphore:
+    """Test the cap on concurrent AI agent calls."""
+
+    def test_cap_applies_on_each_event_loop(self, agent, monkeypatch):
+        """Test AI calls are capped under contention on successive event loops."""
+        monkeypatch.setattr(
+            question_engine, "get_settings", lambda: SimpleNamespace(question_ai_max_concurrency=1)
+        )
+        running = 0
+        peak = 0
+        original = agent.generate_questions
+
+        async def generate_questions(*args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                running -= 1
+
+        agent.generate_questions = generate_questions
+
+        async def run():
+            engine = QuestionEngine()
+            return await asyncio.gather(*[
+                engine.generate_questions_for_project(f"{PROJECT_DESCRIPTION} {i}", 8)
+                for i in range(3)
+            ])
+
+        for _ in range(2):
+            results = asyncio.run(run())
+            assert [len(questions) for questions in results] == [8, 8, 8]
+
+        assert agent.calls == 6
+        assert peak == 1